@@ -0,0 +1,213 @@
+"""ISO 639 language names that have a two-letter code.
+
+Generated from pycountry so the app does not load its ISO database at runtime.
+Regenerate in place (needs pycountry installed) with:
+
+    python _langs.py
+"""
+
+LANG_NAMES = (
+    'Abkhazian',
+    'Afar',
+    'Afrikaans',
+    'Akan',
+    'Albanian',
+    'Amharic',
+    'Arabic',
+    'Aragonese',
+    'Armenian',
+    'Assamese',
+    'Avaric',
+    'Avestan',
+    'Aymara',
+    'Azerbaijani',
+    'Bambara',
+    'Bashkir',
+    'Basque',
+    'Belarusian',
+    'Bengali',
+    'Bislama',
+    'Bosnian',
+    'Breton',
+    'Bulgarian',
+    'Burmese',
+    'Catalan',
+    'Chamorro',
+    'Chechen',
+    'Chichewa',
+    'Chinese',
+    'Church Slavic',
+    'Chuvash',
+    'Cornish',
+    'Corsican',
+    'Cree',
+    'Croatian',
+    'Czech',
+    'Danish',
+    'Divehi',
+    'Dutch',
+    'Dzongkha',
+    'English',
+    'Esperanto',
+    'Estonian',
+    'Ewe',
+    'Faroese',
+    'Fijian',
+    'Finnish',
+    'French',
+    'Fulah',
+    'Galician',
+    'Ganda',
+    'Georgian',
+    'German',
+    'Guarani',
+    'Gujarati',
+    'Haitian',
+    'Hausa',
+    'Hebrew',
+    'Herero',
+    'Hindi',
+    'Hiri Motu',
+    'Hungarian',
+    'Icelandic',
+    'Ido',
+    'Igbo',
+    'Indonesian',
+    'Interlingua (International Auxiliary Language Association)',
+    'Interlingue',
+    'Inuktitut',
+    'Inupiaq',
+    'Irish',
+    'Italian',
+    'Japanese',
+    'Javanese',
+    'Kalaallisut',
+    'Kannada',
+    'Kanuri',
+    'Kashmiri',
+    'Kazakh',
+    'Khmer',
+    'Kikuyu',
+    'Kinyarwanda',
+    'Kirghiz',
+    'Komi',
+    'Kongo',
+    'Korean',
+    'Kuanyama',
+    'Kurdish',
+    'Lao',
+    'Latin',
+    'Latvian',
+    'Limburgan',
+    'Lingala',
+    'Lithuanian',
+    'Luba-Katanga',
+    'Luxembourgish',
+    'Macedonian',
+    'Malagasy',
+    'Malay (macrolanguage)',
+    'Malayalam',
+    'Maltese',
+    'Manx',
+    'Maori',
+    'Marathi',
+    'Marshallese',
+    'Modern Greek (1453-)',
+    'Mongolian',
+    'Nauru',
+    'Navajo',
+    'Ndonga',
+    'Nepali (macrolanguage)',
+    'North Ndebele',
+    'Northern Sami',
+    'Norwegian',
+    'Norwegian Bokmål',
+    'Norwegian Nynorsk',
+    'Occitan (post 1500)',
+    'Ojibwa',
+    'Oriya (macrolanguage)',
+    'Oromo',
+    'Ossetian',
+    'Pali',
+    'Panjabi',
+    'Persian',
+    'Polish',
+    'Portuguese',
+    'Pushto',
+    'Quechua',
+    'Romanian',
+    'Romansh',
+    'Rundi',
+    'Russian',
+    'Samoan',
+    'Sango',
+    'Sanskrit',
+    'Sardinian',
+    'Scottish Gaelic',
+    'Serbian',
+    'Serbo-Croatian',
+    'Shona',
+    'Sichuan Yi',
+    'Sindhi',
+    'Sinhala',
+    'Slovak',
+    'Slovenian',
+    'Somali',
+    'South Ndebele',
+    'Southern Sotho',
+    'Spanish',
+    'Sundanese',
+    'Swahili (macrolanguage)',
+    'Swati',
+    'Swedish',
+    'Tagalog',
+    'Tahitian',
+    'Tajik',
+    'Tamil',
+    'Tatar',
+    'Telugu',
+    'Thai',
+    'Tibetan',
+    'Tigrinya',
+    'Tonga (Tonga Islands)',
+    'Tsonga',
+    'Tswana',
+    'Turkish',
+    'Turkmen',
+    'Twi',
+    'Uighur',
+    'Ukrainian',
+    'Urdu',
+    'Uzbek',
+    'Venda',
+    'Vietnamese',
+    'Volapük',
+    'Walloon',
+    'Welsh',
+    'Western Frisian',
+    'Wolof',
+    'Xhosa',
+    'Yiddish',
+    'Yoruba',
+    'Zhuang',
+    'Zulu',
+)
+
+if __name__ == "__main__":
+    import re
+
+    import pycountry
+
+    names = sorted({lang.name for lang in pycountry.languages if hasattr(lang, "alpha_2")})
+    body = "".join(f"    {name!r},\n" for name in names)
+
+    with open(__file__, encoding="utf-8") as f:
+        source = f.read()
+    source = re.sub(
+        r"(?ms)^LANG_NAMES = \(\n.*?^\)\n",
+        lambda _: f"LANG_NAMES = (\n{body})\n",
+        source,
+        count=1,
+    )
+    with open(__file__, "w", encoding="utf-8") as f:
+        f.write(source)
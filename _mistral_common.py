@@ -0,0 +1,58 @@
+"""Helpers shared by app.py and app_b.py: the Mistral client, retries and image encoding."""
+
+import httpx
+import streamlit as st
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from mistralai import Mistral
+from mistralai.models import SDKError
+
+# SIMD-accelerated base64 when available, stdlib otherwise
+try:
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+# Transient HTTP statuses worth retrying
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Initialize the Mistral client once per server process so the HTTP
+# connection pool (and its keep-alive connections) survives script reruns
+@st.cache_resource
+def get_client(api_key: str) -> Mistral:
+    return Mistral(
+        api_key=api_key,
+        client=httpx.Client(
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=50)
+        ),
+    )
+
+# --- Retry transient Mistral API failures (429/5xx, dropped connections) ---
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, SDKError):
+        return exc.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+retry_transient = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    retry=retry_if_exception(_is_transient),
+    reraise=True,
+)
+
+@retry_transient
+def mistral_call(fn, /, *args, **kwargs):
+    """Calls a Mistral client method, retrying on transient errors."""
+    return fn(*args, **kwargs)
+
+@retry_transient
+async def mistral_call_async(fn, /, *args, **kwargs):
+    """Awaits a Mistral client coroutine method, retrying on transient errors."""
+    return await fn(*args, **kwargs)
+
+def image_data_url(image_bytes: bytes) -> str:
+    """
+    Encodes raw image bytes as a "data:image/jpeg;base64,..." URL.
+    Stays in bytes until a single ASCII decode at the end.
+    """
+    return (b"data:image/jpeg;base64," + b64encode(image_bytes)).decode("ascii")
@@ -2,16 +2,22 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-import base64
+import hashlib
 import json
-from enum import Enum
-import pycountry
-from pydantic import BaseModel
+from functools import lru_cache
 
 # Mistral.ai Python client
 from mistralai import Mistral, DocumentURLChunk, ImageURLChunk, TextChunk
 from mistralai.models import OCRResponse
 
+from _mistral_common import get_client, image_data_url, mistral_call
+
+# SIMD-accelerated BLAKE3 for cache keys when available, blake2b otherwise
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
 # --- Load environment variables (ensure .env has MISTRAL_API_KEY) ---
 load_dotenv()
 API_KEY = os.getenv("MISTRAL_API_KEY")  
@@ -19,45 +25,108 @@ if not API_KEY:
     st.error("MISTRAL_API_KEY not found in environment. Please set it in your .env file.")
     st.stop()
 
-# Initialize the Mistral client
-client = Mistral(api_key=API_KEY)
+client = get_client(API_KEY)
+
+# Images below this size are sent inline as a base64 data URL; larger ones
+# are uploaded as raw bytes (no 33% base64 overhead) behind a signed URL
+INLINE_IMAGE_MAX_BYTES = 256 * 1024
+
+def image_url_for(image_bytes: bytes, image_name: str) -> str:
+    """Returns a URL the Mistral API can read the image from."""
+    if len(image_bytes) < INLINE_IMAGE_MAX_BYTES:
+        return image_data_url(image_bytes)
+
+    uploaded_resp = mistral_call(
+        client.files.upload,
+        file={
+            "file_name": image_name,
+            "content": image_bytes,
+        },
+        purpose="ocr",
+    )
+    signed_url = mistral_call(client.files.get_signed_url, file_id=uploaded_resp.id, expiry=1)
+    return signed_url.url
+
+def file_hash(data: bytes) -> str:
+    """Short content hash used as the cache key for uploaded files."""
+    if blake3 is not None:
+        return blake3(data).hexdigest(length=16)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# --- OCR results cached by file content ---
+# The leading underscores keep Streamlit from hashing the (large) file
+# bytes; the content hash alone is the cache key.
+@st.cache_data(show_spinner=False, persist="disk", max_entries=256)
+def cached_image_ocr(content_hash: str, _image_bytes: bytes, _image_name: str) -> OCRResponse:
+    return mistral_call(
+        client.ocr.process,
+        document=ImageURLChunk(image_url=image_url_for(_image_bytes, _image_name)),
+        model="mistral-ocr-latest"
+    )
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=256)
+def cached_pdf_ocr_text(content_hash: str, _pdf_bytes: bytes, _file_name: str) -> str:
+    """Uploads a PDF, runs OCR on it and returns the text of all pages."""
+    # A) Upload the PDF to Mistral
+    uploaded_resp = mistral_call(
+        client.files.upload,
+        file={
+            "file_name": _file_name,
+            "content": _pdf_bytes,
+        },
+        purpose="ocr",
+    )
+    # B) Retrieve a signed URL for that file
+    signed_url = mistral_call(client.files.get_signed_url, file_id=uploaded_resp.id, expiry=1)
+
+    # C) Process the PDF with OCR
+    pdf_response = mistral_call(
+        client.ocr.process,
+        document=DocumentURLChunk(document_url=signed_url.url),
+        model="mistral-ocr-latest",
+        include_image_base64=False
+    )
+
+    # Combine OCR text from all pages
+    return "\n\n".join(page.markdown for page in pdf_response.pages)
 
 # --- Setup for structured OCR output (sample from your original code) ---
-languages = {
-    lang.alpha_2: lang.name
-    for lang in pycountry.languages
-    if hasattr(lang, 'alpha_2')
-}
-
-class LanguageMeta(Enum.__class__):
-    def __new__(metacls, cls, bases, classdict):
-        for code, name in languages.items():
-            # Convert name to uppercase with underscores
-            classdict[name.upper().replace(' ', '_')] = name
-        return super().__new__(metacls, cls, bases, classdict)
-
-class Language(Enum, metaclass=LanguageMeta):
-    pass
-
-class StructuredOCR(BaseModel):
-    file_name: str
-    topics: list[str]
-    languages: list[Language]
-    ocr_contents: dict
+# Built on first use so the plain OCR paths don't pay for it at startup
+@lru_cache(maxsize=None)
+def _get_structured_model():
+    """Returns the StructuredOCR pydantic model used by structured_ocr."""
+    from typing import Literal
+
+    from pydantic import BaseModel
+
+    from _langs import LANG_NAMES
+
+    # A Literal puts the allowed names into the JSON schema sent to
+    # chat.parse, so the model can only answer with valid spellings
+    Language = Literal[LANG_NAMES]
+
+    class StructuredOCR(BaseModel):
+        file_name: str
+        topics: list[str]
+        languages: list[Language]
+        ocr_contents: dict
+
+    return StructuredOCR
+
+# Static parts of the structured-extraction prompt; only the OCR markdown varies
+PROMPT_PREFIX = "This is the image's OCR in markdown:\n<BEGIN_IMAGE_OCR>\n"
+PROMPT_SUFFIX = (
+    "\n<END_IMAGE_OCR>.\n"
+    "Convert this into a structured JSON response with the OCR contents in a sensible dictionary."
+)
 
 # --- Helper function for structured OCR (images only in this example) ---
-def structured_ocr(image_bytes: bytes, image_name: str) -> StructuredOCR:
+def structured_ocr(image_bytes: bytes, image_name: str):
     """Takes raw bytes of an image, runs OCR, 
-       then runs a structured extraction on the results."""
-    # Encode file in base64
-    encoded_image = base64.b64encode(image_bytes).decode()
-    base64_data_url = f"data:image/jpeg;base64,{encoded_image}"
-
-    # Run OCR
-    ocr_response = client.ocr.process(
-        document=ImageURLChunk(image_url=base64_data_url),
-        model="mistral-ocr-latest"
-    )
+       then runs a structured extraction on the results.
+       Returns a StructuredOCR instance (see _get_structured_model)."""
+    # Run OCR (reused from cache for previously seen images)
+    ocr_response = cached_image_ocr(file_hash(image_bytes), image_bytes, image_name)
 
     # Grab markdown from the OCR output
     if len(ocr_response.pages) > 0:
@@ -65,29 +134,24 @@ def structured_ocr(image_bytes: bytes, image_name: str) -> StructuredOCR:
     else:
         image_ocr_markdown = ""
 
-    # Use the chat parse method to get structured output
-    chat_response = client.chat.parse(
+    # Use the chat parse method to get structured output. Only the OCR
+    # markdown is sent, so the image isn't uploaded a second time.
+    chat_response = mistral_call(
+        client.chat.parse,
         model="pixtral-12b-latest",
         messages=[
             {
                 "role": "user",
                 "content": [
-                    ImageURLChunk(image_url=base64_data_url),
-                    TextChunk(
-                        text=(
-                            "This is the image's OCR in markdown:\n"
-                            f"<BEGIN_IMAGE_OCR>\n{image_ocr_markdown}\n<END_IMAGE_OCR>.\n"
-                            "Convert this into a structured JSON response with the OCR contents in a sensible dictionary."
-                        )
-                    ),
+                    TextChunk(text=PROMPT_PREFIX + image_ocr_markdown + PROMPT_SUFFIX),
                 ],
             },
         ],
-        response_format=StructuredOCR,
+        response_format=_get_structured_model(),
         temperature=0
     )
 
-    parsed_result: StructuredOCR = chat_response.choices[0].message.parsed
+    parsed_result = chat_response.choices[0].message.parsed
 
     # If desired, you can replace the 'file_name' field with the actual
     # uploaded file name, etc.:
@@ -109,27 +173,12 @@ def main():
             if file_extension == ".pdf":
                 st.write("Processing PDF ...")
 
-                # A) Upload the PDF to Mistral
-                uploaded_resp = client.files.upload(
-                    file={
-                        "file_name": Path(uploaded_file.name).stem,
-                        "content": uploaded_file.read(),
-                    },
-                    purpose="ocr",
-                )
-                # B) Retrieve a signed URL for that file
-                signed_url = client.files.get_signed_url(file_id=uploaded_resp.id, expiry=1)
-
-                # C) Process the PDF with OCR
-                pdf_response = client.ocr.process(
-                    document=DocumentURLChunk(document_url=signed_url.url),
-                    model="mistral-ocr-latest",
-                    include_image_base64=False
+                # Upload + OCR, reused from cache for previously seen PDFs
+                pdf_bytes = uploaded_file.getvalue()
+                ocr_text = cached_pdf_ocr_text(
+                    file_hash(pdf_bytes), pdf_bytes, Path(uploaded_file.name).stem
                 )
 
-                # Combine OCR text from all pages
-                ocr_text = "\n\n".join(page.markdown for page in pdf_response.pages)
-
                 # Display OCR text
                 st.subheader("Extracted OCR Text (Markdown)")
                 st.text_area("PDF OCR Result:", value=ocr_text, height=300)
@@ -145,16 +194,11 @@ def main():
             else:
                 st.write("Processing Image ...")
 
-                # Read and encode the image
+                # Read the image
                 image_bytes = uploaded_file.read()
-                encoded_image = base64.b64encode(image_bytes).decode()
-                base64_data_url = f"data:image/jpeg;base64,{encoded_image}"
 
-                # Process with the OCR model
-                image_ocr_response = client.ocr.process(
-                    document=ImageURLChunk(image_url=base64_data_url),
-                    model="mistral-ocr-latest"
-                )
+                # Process with the OCR model (reused from cache for previously seen images)
+                image_ocr_response = cached_image_ocr(file_hash(image_bytes), image_bytes, uploaded_file.name)
 
                 if not image_ocr_response.pages:
                     st.warning("No OCR text found in the image.")
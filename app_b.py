@@ -1,14 +1,20 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import base64
-import json
+import asyncio
+import orjson
+import queue
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from pathlib import Path
 
 # Mistral.ai imports
-from mistralai import Mistral
+from mistralai import Mistral, ImageURLChunk
+
+from _mistral_common import get_client, image_data_url, mistral_call, mistral_call_async
 
 # --- Load environment variables (.env file with MISTRAL_API_KEY=...) ---
 load_dotenv()
@@ -17,37 +23,223 @@ if not API_KEY:
     st.error("MISTRAL_API_KEY not found in environment. Please set it in your .env file.")
     st.stop()
 
-# Initialize the Mistral client
-client = Mistral(api_key=API_KEY)
+client = get_client(API_KEY)
 
 # OCR model name
 OCR_MODEL = "mistral-ocr-latest"
 
-# Helper function to encode image data as base64
-def encode_image_data(image_bytes: bytes) -> str:
+# Uploads with at least this many images go through a batch job; smaller
+# ones call the OCR endpoint directly instead of paying the queueing latency
+BATCH_MIN_IMAGES = 50
+# Max in-flight OCR requests on the direct path
+OCR_CONCURRENCY = 8
+# Upper bound for the batch status polling interval, in seconds
+MAX_POLL_INTERVAL = 60.0
+
+def iter_data_urls(uploaded_files):
+    """
+    Reads and encodes the uploaded files in parallel, yielding the
+    "data:image/jpeg;base64,..." URLs in upload order as they become ready.
+    """
+    # ex.map preserves input order, so custom_ids stay stable
+    with ThreadPoolExecutor(max_workers=min(32, len(uploaded_files))) as ex:
+        yield from ex.map(lambda file: image_data_url(file.read()), uploaded_files)
+
+def encode_uploaded_files(uploaded_files) -> list[str]:
     """
-    Encodes raw image bytes to a base64-encoded string.
+    Returns the data URLs of all uploaded files, in upload order.
     """
-    return base64.b64encode(image_bytes).decode("utf-8")
+    return list(iter_data_urls(uploaded_files))
 
-def create_batch_file(image_urls, output_file: str):
+def create_batch_file(image_urls) -> BytesIO:
     """
-    Creates a JSONL file for the batch inference. 
+    Creates an in-memory JSONL buffer for the batch inference. 
     Each line includes 'custom_id' and 'body' with the OCR request details.
+
+    'image_urls' may be a lazy iterable: serialization runs on a background
+    thread, so it overlaps with whatever is still producing the URLs.
     """
-    with open(output_file, 'w') as file:
-        for index, url in enumerate(image_urls):
-            entry = {
-                "custom_id": str(index),  # Each request gets a custom_id
-                "body": {
-                    "document": {
-                        "type": "image_url",
-                        "image_url": url
-                    },
-                    "include_image_base64": False
+    buf = BytesIO()
+    pending = queue.Queue(maxsize=64)
+    errors = []
+
+    def writer():
+        try:
+            while (item := pending.get()) is not None:
+                index, url = item
+                entry = {
+                    "custom_id": str(index),  # Each request gets a custom_id
+                    "body": {
+                        "document": {
+                            "type": "image_url",
+                            "image_url": url
+                        },
+                        "include_image_base64": False
+                    }
                 }
-            }
-            file.write(json.dumps(entry) + '\n')
+                buf.write(orjson.dumps(entry) + b'\n')
+        except BaseException as e:
+            errors.append(e)
+            # Keep draining so the producer never blocks on a full queue
+            while pending.get() is not None:
+                pass
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    try:
+        for item in enumerate(image_urls):
+            if errors:
+                # Writer died; stop producing, its error is raised below
+                break
+            pending.put(item)
+    finally:
+        # Sentinel: stop the writer even if encoding raised
+        pending.put(None)
+        writer_thread.join()
+    if errors:
+        # Never hand back a truncated batch file
+        raise errors[0]
+    buf.seek(0)
+    return buf
+
+async def _ocr_one(async_client: Mistral, image_url: str, sem: asyncio.Semaphore):
+    """
+    Runs OCR on a single image while holding a semaphore slot.
+    """
+    async with sem:
+        return await mistral_call_async(
+            async_client.ocr.process_async,
+            document=ImageURLChunk(image_url=image_url),
+            model=OCR_MODEL,
+            include_image_base64=False
+        )
+
+async def _ocr_all(image_urls):
+    sem = asyncio.Semaphore(OCR_CONCURRENCY)
+    # A fresh async client per event loop (httpx async connections can't
+    # outlive asyncio.run); it shares the cached sync client so no extra
+    # connection pool is left unclosed
+    async with Mistral(api_key=API_KEY, client=client.sdk_configuration.client) as async_client:
+        # return_exceptions: one failed image must not discard the others
+        return await asyncio.gather(
+            *(_ocr_one(async_client, url, sem) for url in image_urls),
+            return_exceptions=True
+        )
+
+def _direct_result_line(index: int, response) -> bytes:
+    """
+    Formats one direct OCR result (or its exception) like a line of the
+    batch job's output file.
+    """
+    if isinstance(response, BaseException):
+        entry = {
+            "custom_id": str(index),
+            "response": {"status_code": getattr(response, "status_code", None)},
+            "error": {"message": str(response)}
+        }
+    else:
+        entry = {
+            "custom_id": str(index),
+            "response": {"status_code": 200, "body": response.model_dump(mode="json")}
+        }
+    return orjson.dumps(entry) + b"\n"
+
+def run_direct_ocr(image_urls) -> bytes:
+    """
+    Runs OCR on all images concurrently and returns the results as JSONL
+    shaped like the batch job's output file. Failed images are written as
+    error lines instead of aborting the run.
+    """
+    responses = asyncio.run(_ocr_all(image_urls))
+
+    total = len(responses)
+    failed = sum(isinstance(response, BaseException) for response in responses)
+    st.write(
+        f"Total: {total} | "
+        f"Succeeded: {total - failed} | "
+        f"Failed: {failed}"
+    )
+    if failed:
+        st.warning(f"OCR failed for {failed} of {total} images; see the error lines in the results.")
+
+    return b"".join(
+        _direct_result_line(index, response)
+        for index, response in enumerate(responses)
+    )
+
+def run_batch_job(uploaded_files):
+    """
+    Submits the images as a batch OCR job and waits for it to finish.
+    Returns the results file content as bytes, or None if the job did not complete.
+    """
+    # Encode the images and build the JSONL batch file in memory (no shared
+    # file on disk); encoding and serialization run in a pipeline
+    batch_file = create_batch_file(iter_data_urls(uploaded_files))
+    st.write("Created JSONL batch file with OCR requests.")
+
+    # Upload the JSONL file to Mistral
+    st.write("Uploading batch file to Mistral...")
+    batch_data = mistral_call(
+        client.files.upload,
+        file={
+            "file_name": "batch_file.jsonl",
+            "content": batch_file.getvalue()
+        },
+        purpose="batch"
+    )
+    st.write(f"File uploaded with ID: {batch_data.id}")
+
+    # Create the batch job. Not retried: a 5xx after the job was accepted
+    # would submit the whole batch twice.
+    created_job = client.batch.jobs.create(
+        input_files=[batch_data.id],
+        model=OCR_MODEL,
+        endpoint="/v1/ocr",
+        metadata={"job_type": "streamlit_demo"}
+    )
+    st.write(f"Created batch job with ID: {created_job.id}")
+
+    # Poll for job completion
+    st.write("Polling job status. This may take a while for large batches...")
+    poll_interval = 2.0  # seconds, grows up to MAX_POLL_INTERVAL
+    last_progress = None
+    # Re-render status in place instead of appending a line per poll
+    status_box = st.empty()
+    progress_bar = st.progress(0.0)
+    while True:
+        retrieved_job = mistral_call(client.batch.jobs.get, job_id=created_job.id)
+        total = retrieved_job.total_requests
+        succeeded = retrieved_job.succeeded_requests
+        failed = retrieved_job.failed_requests
+
+        # Only re-render when something actually changed
+        progress = (retrieved_job.status, succeeded, failed)
+        if progress != last_progress:
+            done = (succeeded + failed) / total if total else 0.0
+            status_box.markdown(
+                f"Status: {retrieved_job.status} | "
+                f"Total: {total} | "
+                f"Succeeded: {succeeded} | "
+                f"Failed: {failed} | "
+                f"Percent Done: {round(done * 100, 2)}%"
+            )
+            progress_bar.progress(done)
+            last_progress = progress
+        if retrieved_job.status not in ["QUEUED", "RUNNING"]:
+            # Job finished (either COMPLETED or FAILED)
+            break
+        # Jittered exponential backoff so long jobs aren't polled every 2s
+        time.sleep(poll_interval + random.uniform(0, poll_interval * 0.1))
+        poll_interval = min(MAX_POLL_INTERVAL, poll_interval * 1.5)
+
+    if retrieved_job.status != "COMPLETED":
+        st.error(f"Batch job ended with status: {retrieved_job.status}")
+        return None
+
+    st.success("Batch job completed. Downloading the results...")
+    # The results are in retrieved_job.output_file; download() returns a
+    # streamed httpx.Response, so read it fully into bytes
+    return mistral_call(client.files.download, file_id=retrieved_job.output_file).read()
 
 def main():
     st.title("Mistral Batch OCR Demo")
@@ -57,7 +249,8 @@ def main():
         This Streamlit app demonstrates how to:
         1. Upload multiple images.
         2. Convert them into a JSONL batch file.
-        3. Use Mistral's batch inference to run OCR on all uploaded images in bulk.
+        3. Use Mistral's batch inference to run OCR on all uploaded images in bulk
+           (small uploads are sent straight to the OCR endpoint concurrently).
         4. Monitor the batch job's progress and download results once complete.
         """
     )
@@ -72,79 +265,24 @@ def main():
     # We won't create the batch file or run the job until the user clicks a button
     if uploaded_files:
         if st.button("Run Batch OCR"):
-            # 1) Convert each image to base64
+            # 1) Small uploads are base64-encoded and sent straight to the OCR
+            #    endpoint; larger ones are submitted as a batch job
             st.write("Encoding images in base64...")
-            image_urls = []
-            for file in uploaded_files:
-                img_bytes = file.read()
-                base64_img = encode_image_data(img_bytes)
-                # Create "data:image/jpeg;base64,..." format
-                img_data_url = f"data:image/jpeg;base64,{base64_img}"
-                image_urls.append(img_data_url)
-
-            # 2) Create the JSONL batch file
-            batch_file_name = "batch_file.jsonl"
-            create_batch_file(image_urls, batch_file_name)
-            st.write("Created JSONL batch file with OCR requests.")
-
-            # 3) Upload the JSONL file to Mistral
-            st.write("Uploading batch file to Mistral...")
-            with open(batch_file_name, "rb") as f:
-                batch_data = client.files.upload(
-                    file={
-                        "file_name": batch_file_name,
-                        "content": f
-                    },
-                    purpose="batch"
-                )
-            st.write(f"File uploaded with ID: {batch_data.id}")
-
-            # 4) Create the batch job
-            created_job = client.batch.jobs.create(
-                input_files=[batch_data.id],
-                model=OCR_MODEL,
-                endpoint="/v1/ocr",
-                metadata={"job_type": "streamlit_demo"}
-            )
-            st.write(f"Created batch job with ID: {created_job.id}")
-
-            # 5) Poll for job completion
-            st.write("Polling job status. This may take a while for large batches...")
-            poll_interval = 2.0  # seconds
-            while True:
-                retrieved_job = client.batch.jobs.get(job_id=created_job.id)
-                total = retrieved_job.total_requests
-                succeeded = retrieved_job.succeeded_requests
-                failed = retrieved_job.failed_requests
-
-                st.write(
-                    f"Status: {retrieved_job.status} | "
-                    f"Total: {total} | "
-                    f"Succeeded: {succeeded} | "
-                    f"Failed: {failed} | "
-                    f"Percent Done: {round((succeeded + failed) / total * 100, 2)}%"
-                )
-                if retrieved_job.status not in ["QUEUED", "RUNNING"]:
-                    # Job finished (either COMPLETED or FAILED)
-                    break
-                time.sleep(poll_interval)
-                # Clear output in a normal notebook environment, but in Streamlit
-                # we can just keep printing. 
-                # If you want to streamline it, you might re-run the script or re-draw.
-
-            # 6) If the job is complete, let the user download the results
-            if retrieved_job.status == "COMPLETED":
-                st.success("Batch job completed. Downloading the results...")
-                # The results are in retrieved_job.output_file
-                output_file_id = retrieved_job.output_file
-                # Download to memory
-                file_content = client.files.download(file_id=output_file_id)
-                st.write("Download complete. Here is a preview of the results (first 2 lines):")
-
-                # Show a short preview
-                lines = file_content.decode("utf-8").splitlines()
-                for line in lines[:2]:
-                    st.json(json.loads(line))
+            if len(uploaded_files) < BATCH_MIN_IMAGES:
+                image_urls = encode_uploaded_files(uploaded_files)
+                st.write(f"Running OCR on {len(image_urls)} images concurrently...")
+                file_content = run_direct_ocr(image_urls)
+            else:
+                file_content = run_batch_job(uploaded_files)
+
+            # 2) If OCR finished, let the user download the results
+            if file_content is not None:
+                st.write("OCR complete. Here is a preview of the results (first 2 lines):")
+
+                # Show a short preview, parsing only the first two lines
+                for line in file_content.split(b"\n", 2)[:2]:
+                    if line.strip():
+                        st.json(orjson.loads(line))
 
                 # Provide a download button for the entire results file
                 btn = st.download_button(
@@ -153,8 +291,6 @@ def main():
                     file_name="batch_ocr_results.jsonl",
                     mime="application/json"
                 )
-            else:
-                st.error(f"Batch job ended with status: {retrieved_job.status}")
 
 if __name__ == "__main__":
     main()